@@ -1,133 +1,42 @@
-import os
-import base64
-
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-from supabase import create_client
-
-
-# =========================
-# Helpers (pliki/obrazy)
-# =========================
-def safe_path(rel_path: str) -> str:
-    """Ścieżka względna do katalogu z tym plikiem .py (działa na Streamlit Cloud)."""
-    return os.path.join(os.path.dirname(__file__), rel_path)
-
-
-def sidebar_image_fixed_height(path: str, height_px: int = 260):
-    """Wyświetl obrazek w sidebarze w stałej wysokości (bez 'skakania')."""
-    with open(safe_path(path), "rb") as f:
-        data = base64.b64encode(f.read()).decode("utf-8")
-
-    ext = path.split(".")[-1].lower()
-    if ext in ("jpg", "jpeg"):
-        mime = "jpeg"
-    elif ext in ("png", "webp", "gif"):
-        mime = ext
-    else:
-        mime = "png"
-
-    st.sidebar.markdown(
-        f"""
-        <div style="width:100%; height:{height_px}px; display:flex; align-items:center; justify-content:center;">
-          <img src="data:image/{mime};base64,{data}"
-               style="max-width:100%; max-height:100%; object-fit:contain;" />
-        </div>
-        """,
-        unsafe_allow_html=True,
-    )
-
-
-# =========================
-# Supabase init
-# =========================
-@st.cache_resource
-def get_supabase():
-    url = st.secrets["SUPABASE_URL"]
-    key = st.secrets["SUPABASE_KEY"]
-    return create_client(url, key)
-
-
-supabase = get_supabase()
+from streamlit.errors import StreamlitAPIException
+
+from lib.db import (
+    KATEGORIE_CACHE,
+    PRODUKTY_CACHE,
+    add_kategoria,
+    add_produkt,
+    delete_kategoria,
+    delete_produkt,
+    fetch_dashboard_stats,
+    fetch_kategorie,
+    fetch_kategorie_options,
+    fetch_kategorie_select,
+    fetch_low_stock,
+    fetch_produkty_join,
+    fetch_produkty_options,
+    fetch_wartosc_kategorii,
+    search_produkty_options,
+    update_produkt,
+)
+from lib.ui import kategorie_figure, sidebar_image_fixed_height
 
 
 # =========================
-# DB functions
+# Odświeżanie po zmianach
 # =========================
-@st.cache_data(ttl=10)
-def fetch_kategorie():
-    resp = supabase.table("kategorie").select("id,nazwa,opis").order("id").execute()
-    return resp.data or []
-
-
-@st.cache_data(ttl=10)
-def fetch_produkty_raw():
-    resp = supabase.table("produkty").select("id,nazwa,liczba,cena,kategoria_id").order("id").execute()
-    return resp.data or []
-
-
-@st.cache_data(ttl=10)
-def fetch_produkty_join():
-    prods = fetch_produkty_raw()
-    kats = fetch_kategorie()
-
-    kat_map = {k["id"]: k.get("nazwa") for k in kats}
-
-    rows = []
-    for p in prods:
-        liczba = p.get("liczba") or 0
-        cena = p.get("cena") or 0.0
-        rows.append(
-            {
-                "id": p.get("id"),
-                "nazwa": p.get("nazwa"),
-                "liczba": int(liczba),
-                "cena": float(cena),
-                "kategoria": kat_map.get(p.get("kategoria_id")),
-                "wartosc": float(liczba) * float(cena),
-            }
-        )
-    return rows
-
-
-def add_kategoria(nazwa, opis):
-    supabase.table("kategorie").insert({"nazwa": nazwa, "opis": opis}).execute()
-
-
-def add_produkt(nazwa, liczba, cena, kategoria_id):
-    supabase.table("produkty").insert(
-        {
-            "nazwa": nazwa,
-            "liczba": int(liczba),
-            "cena": float(cena),
-            "kategoria_id": int(kategoria_id) if kategoria_id is not None else None,
-        }
-    ).execute()
-
-
-def update_produkt(prod_id, nazwa, liczba, cena, kategoria_id):
-    supabase.table("produkty").update(
-        {
-            "nazwa": nazwa,
-            "liczba": int(liczba),
-            "cena": float(cena),
-            "kategoria_id": int(kategoria_id) if kategoria_id is not None else None,
-        }
-    ).eq("id", int(prod_id)).execute()
-
-
-def delete_produkt(prod_id):
-    supabase.table("produkty").delete().eq("id", int(prod_id)).execute()
+def refresh(*fns):
+    """Wyczyść cache tylko podanych funkcji (tabel, które się zmieniły) i przeładuj.
 
-
-def delete_kategoria(kat_id):
-    supabase.table("kategorie").delete().eq("id", int(kat_id)).execute()
-
-
-def refresh():
-    st.cache_data.clear()
-    st.rerun()
+    Wywoływane z widoków-fragmentów: przeładowuje tylko bieżący widok, nie cały skrypt.
+    """
+    for fn in fns:
+        fn.clear()
+    try:
+        st.rerun(scope="fragment")
+    except StreamlitAPIException:
+        # To nie był rerun fragmentu (np. pełny przebieg skryptu) - przeładuj wszystko
+        st.rerun()
 
 
 # =========================
@@ -152,33 +61,35 @@ choice = st.sidebar.selectbox("Menu", menu)
 if "tryb_swiateczny" not in st.session_state:
     st.session_state.tryb_swiateczny = False
 
-st.sidebar.markdown("---")
-st.session_state.tryb_swiateczny = st.sidebar.checkbox("🎄 Tryb świąteczny", value=st.session_state.tryb_swiateczny)
 
-# Obrazek pod menu
-# Jeśli trzymasz obrazki w root, użyj: "obrazek1.png"/"obrazek2.png"
-img_path = "assets/obrazek2.png" if st.session_state.tryb_swiateczny else "assets/obrazek1.png"
-sidebar_image_fixed_height(img_path, height_px=260)
+@st.fragment
+def sidebar_tryb_swiateczny():
+    """Checkbox + obrazek jako fragment - przełączenie nie przelicza reszty strony."""
+    st.markdown("---")
+    st.session_state.tryb_swiateczny = st.checkbox("🎄 Tryb świąteczny", value=st.session_state.tryb_swiateczny)
+
+    # Obrazek pod menu
+    # Jeśli trzymasz obrazki w root, użyj: "obrazek1.png"/"obrazek2.png"
+    img_path = "assets/obrazek2.png" if st.session_state.tryb_swiateczny else "assets/obrazek1.png"
+    sidebar_image_fixed_height(img_path, height_px=260)
 
-# Dane do DF (dla dashboardu i podglądu)
-df = pd.DataFrame(fetch_produkty_join())
+
+with st.sidebar:
+    sidebar_tryb_swiateczny()
 
 
 # =========================
 # Views
 # =========================
-if choice == "🏠 Dashboard":
+@st.fragment
+def render_dashboard(threshold):
     st.title("📊 Analityka Magazynowa")
 
     col1, col2, col3 = st.columns(3)
-    if df.empty:
-        total_value = 0.0
-        total_items = 0
-        low_stock_count = 0
-    else:
-        total_value = float(df["wartosc"].sum())
-        total_items = int(df["liczba"].sum())
-        low_stock_count = int(df[df["liczba"] <= limit_niskiego_stanu].shape[0])
+    stats = fetch_dashboard_stats(threshold)
+    total_value = float(stats.get("total_value") or 0.0)
+    total_items = int(stats.get("total_items") or 0)
+    low_stock_count = int(stats.get("low_stock_count") or 0)
 
     col1.metric("Całkowita wartość", f"{total_value:,.2f} zł")
     col2.metric("Liczba produktów (szt.)", total_items)
@@ -190,80 +101,94 @@ if choice == "🏠 Dashboard":
 
     with left_col:
         st.subheader("Udział wartości w kategoriach")
-        if not df.empty and df["wartosc"].sum() > 0:
-            df_plot = df.copy()
-            df_plot["kategoria"] = df_plot["kategoria"].fillna("Brak kategorii")
-            fig = px.pie(df_plot, values="wartosc", names="kategoria", hole=0.4)
-            st.plotly_chart(fig, use_container_width=True)
+        pie_df = fetch_wartosc_kategorii()
+        if not pie_df.empty and pie_df["wartosc"].sum() > 0:
+            st.plotly_chart(kategorie_figure(pie_df), width="stretch", config={"displayModeBar": False})
         else:
             st.info("Brak danych do wyświetlenia wykresu.")
 
     with right_col:
         st.subheader("⚠️ Alerty niskiego stanu")
-        if not df.empty:
-            low_stock_df = df[df["liczba"] <= limit_niskiego_stanu][["nazwa", "liczba"]]
-        else:
-            low_stock_df = pd.DataFrame(columns=["nazwa", "liczba"])
+        low_stock_df = fetch_low_stock(threshold)
 
         if not low_stock_df.empty:
-            st.error(f"Poniżej progu ({limit_niskiego_stanu} szt.):")
-            st.table(low_stock_df)
+            st.error(f"Poniżej progu ({threshold} szt.):")
+            st.dataframe(low_stock_df, hide_index=True, width="stretch", height=300)
+            if low_stock_count > len(low_stock_df):
+                st.caption(f"Pokazano {len(low_stock_df)} z {low_stock_count} produktów.")
         else:
             st.success("Wszystkie stany w normie.")
 
-elif choice == "📋 Podgląd Danych":
+
+@st.fragment
+def render_podglad():
     st.header("Lista produktów")
-    st.dataframe(df, use_container_width=True)
+    # Pełną tabelę ładujemy tylko w widokach, które jej używają
+    df = fetch_produkty_join()
+    st.dataframe(df, width="stretch")
 
-    csv = df.to_csv(index=False).encode("utf-8")
+    # CSV budowany dopiero przy kliknięciu (callable), z aktualnego df
     st.download_button(
         "⬇️ Pobierz CSV",
-        data=csv,
+        data=lambda: df.to_csv(index=False).encode("utf-8"),
         file_name="produkty.csv",
         mime="text/csv",
+        on_click="ignore",
     )
 
-elif choice == "✏️ Edytuj produkt":
+
+@st.fragment
+def render_edytuj_produkt():
     st.header("✏️ Edytuj produkt")
 
-    prods = fetch_produkty_raw()
-    if not prods:
+    prod_options = fetch_produkty_options()
+    if not prod_options:
         st.info("Brak produktów do edycji.")
     else:
-        prod_labels = {f'{p["id"]} — {p["nazwa"]}': p for p in prods}
-        selected_label = st.selectbox("Wybierz produkt", list(prod_labels.keys()))
-        p = prod_labels[selected_label]
+        _, p = st.selectbox("Wybierz produkt", prod_options, format_func=lambda o: o[0])
 
-        kategorie = fetch_kategorie()
-        kat_options = {k["nazwa"]: k["id"] for k in kategorie} if kategorie else {}
-        kat_names = list(kat_options.keys()) if kat_options else ["(brak kategorii)"]
-
-        default_kat_name = None
-        if kat_options and p.get("kategoria_id") is not None:
-            for name, kid in kat_options.items():
-                if kid == p.get("kategoria_id"):
-                    default_kat_name = name
-                    break
-
-        default_index = kat_names.index(default_kat_name) if default_kat_name in kat_names else 0
+        # Wiersze kategorii prosto do selectboxa; produkt bez kategorii dostaje opcję None (zapis bez zmian nie przypisze pierwszej kategorii)
+        kategorie, kat_index = fetch_kategorie_select()
+        if p.get("kategoria_id") in kat_index:
+            default_index = kat_index[p["kategoria_id"]]
+        else:
+            kategorie, default_index = [None, *kategorie], 0
 
         with st.form("edit_prod_form"):
             nazwa = st.text_input("Nazwa produktu", value=p.get("nazwa") or "")
             liczba = st.number_input("Liczba (szt.)", min_value=0, step=1, value=int(p.get("liczba") or 0))
             cena = st.number_input("Cena", min_value=0.0, format="%.2f", value=float(p.get("cena") or 0.0))
-            kat_name = st.selectbox("Kategoria", kat_names, index=default_index)
+            kat = st.selectbox(
+                "Kategoria",
+                kategorie,
+                index=default_index,
+                format_func=lambda k: k["nazwa"] if k else "(brak kategorii)",
+            )
             submit = st.form_submit_button("Zapisz zmiany")
 
         if submit:
             if not nazwa.strip():
                 st.warning("Podaj nazwę produktu.")
             else:
-                new_kat_id = kat_options.get(kat_name) if kat_options else None
-                update_produkt(p["id"], nazwa.strip(), liczba, cena, new_kat_id)
-                st.success("Zapisano zmiany.")
-                refresh()
-
-elif choice == "➕ Dodaj Kategorię":
+                new_kat_id = kat["id"] if kat else None
+                new = {
+                    "nazwa": nazwa.strip(),
+                    "liczba": int(liczba),
+                    "cena": float(cena),
+                    "kategoria_id": int(new_kat_id) if new_kat_id is not None else None,
+                }
+                # Zapisujemy tylko to, co się zmieniło (bez zmian = bez zapytania do bazy)
+                changes = {k: v for k, v in new.items() if v != p.get(k)}
+                if not changes:
+                    st.info("Brak zmian.")
+                else:
+                    update_produkt(p["id"], changes)
+                    st.success("Zapisano zmiany.")
+                    refresh(*PRODUKTY_CACHE)
+
+
+@st.fragment
+def render_dodaj_kategorie():
     st.header("Dodawanie nowej kategorii")
 
     with st.form("form_kat"):
@@ -277,62 +202,77 @@ elif choice == "➕ Dodaj Kategorię":
         else:
             add_kategoria(nazwa.strip(), opis.strip() if opis else None)
             st.success(f"Dodano kategorię: {nazwa.strip()}")
-            refresh()
+            refresh(*KATEGORIE_CACHE)
 
-elif choice == "➕ Dodaj Produkt":
+
+@st.fragment
+def render_dodaj_produkt():
     st.header("Dodawanie nowego produktu")
 
     kategorie = fetch_kategorie()
     if not kategorie:
         st.warning("Najpierw dodaj kategorię!")
     else:
-        kat_options = {k["nazwa"]: k["id"] for k in kategorie}
-
         with st.form("form_prod"):
             nazwa = st.text_input("Nazwa produktu")
             liczba = st.number_input("Liczba (szt.)", min_value=0, step=1, value=0)
             cena = st.number_input("Cena", min_value=0.0, format="%.2f", value=0.0)
-            kat_name = st.selectbox("Kategoria", list(kat_options.keys()))
+            kat = st.selectbox("Kategoria", kategorie, format_func=lambda k: k["nazwa"])
             submit = st.form_submit_button("Zapisz produkt")
 
         if submit:
             if not nazwa.strip():
                 st.warning("Podaj nazwę produktu.")
             else:
-                add_produkt(nazwa.strip(), liczba, cena, kat_options[kat_name])
+                add_produkt(nazwa.strip(), liczba, cena, kat["id"])
                 st.success(f"Dodano produkt: {nazwa.strip()}")
-                refresh()
+                refresh(*PRODUKTY_CACHE)
 
-elif choice == "🗑️ Usuń Element":
+
+@st.fragment
+def render_usun():
     st.header("Usuwanie")
     st.info("Wybierz odpowiednią zakładkę poniżej")
 
     t1, t2 = st.tabs(["Produkt", "Kategoria"])
 
     with t1:
-        prods_rows = fetch_produkty_raw()
-        if not prods_rows:
-            st.info("Brak produktów do usunięcia.")
+        q = st.text_input("Szukaj produktu", placeholder="fragment nazwy")
+        prod_options = search_produkty_options(q.strip())
+        if not prod_options:
+            st.info("Brak pasujących produktów." if q.strip() else "Brak produktów do usunięcia.")
         else:
-            prod_map = {f'{p["id"]} — {p["nazwa"]}': p["id"] for p in prods_rows}
-            prod_label = st.selectbox("Wybierz produkt", list(prod_map.keys()))
+            _, prod = st.selectbox("Wybierz produkt", prod_options, format_func=lambda o: o[0])
             if st.button("Usuń produkt", type="primary"):
-                delete_produkt(prod_map[prod_label])
+                delete_produkt(prod["id"])
                 st.success("Produkt usunięty.")
-                refresh()
+                refresh(*PRODUKTY_CACHE)
 
     with t2:
-        kats_rows = fetch_kategorie()
-        if not kats_rows:
+        kat_options = fetch_kategorie_options()
+        if not kat_options:
             st.info("Brak kategorii do usunięcia.")
         else:
-            kat_map = {f'{k["id"]} — {k["nazwa"]}': k["id"] for k in kats_rows}
-            kat_label = st.selectbox("Wybierz kategorię", list(kat_map.keys()))
+            _, kat = st.selectbox("Wybierz kategorię", kat_options, format_func=lambda o: o[0])
             if st.button("Usuń kategorię", type="primary"):
                 try:
-                    delete_kategoria(kat_map[kat_label])
+                    delete_kategoria(kat["id"])
                     st.success("Kategoria usunięta.")
-                    refresh()
+                    refresh(*KATEGORIE_CACHE)
                 except Exception as e:
                     st.error("Nie udało się usunąć kategorii. Jeśli są produkty przypisane do tej kategorii, usuń je najpierw.")
                     st.caption(str(e))
+
+
+if choice == "🏠 Dashboard":
+    render_dashboard(limit_niskiego_stanu)
+elif choice == "📋 Podgląd Danych":
+    render_podglad()
+elif choice == "✏️ Edytuj produkt":
+    render_edytuj_produkt()
+elif choice == "➕ Dodaj Kategorię":
+    render_dodaj_kategorie()
+elif choice == "➕ Dodaj Produkt":
+    render_dodaj_produkt()
+elif choice == "🗑️ Usuń Element":
+    render_usun()
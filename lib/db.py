@@ -0,0 +1,216 @@
+import streamlit as st
+from psycopg import sql
+from psycopg_pool import ConnectionPool
+from supabase import create_client
+
+
+# =========================
+# Supabase init
+# =========================
+@st.cache_resource
+def get_supabase():
+    url = st.secrets["SUPABASE_URL"]
+    key = st.secrets["SUPABASE_KEY"]
+    return create_client(url, key)
+
+
+# Zapisy idą bezpośrednio do Postgresa (bez narzutu REST/PostgREST).
+# SUPABASE_PG_URL: connection string z Supabase (Session pooler albo Direct connection;
+# Transaction pooler nie obsługuje prepared statements).
+@st.cache_resource
+def get_pool():
+    # check: połączenie zerwane przez Supabase po bezczynności jest wymieniane przed wydaniem
+    return ConnectionPool(
+        st.secrets["SUPABASE_PG_URL"],
+        min_size=1,
+        max_size=4,
+        open=True,
+        check=ConnectionPool.check_connection,
+    )
+
+
+# Buildery tabel tworzone raz na proces
+@st.cache_resource
+def _tbl(name):
+    return get_supabase().table(name)
+
+
+# =========================
+# DB functions
+# =========================
+@st.cache_data(ttl=10, refresh_mode="background", show_spinner=False)
+def fetch_kategorie():
+    resp = _tbl("kategorie").select("id,nazwa,opis").order("id").execute()
+    return resp.data or []
+
+
+@st.cache_data(ttl=10, refresh_mode="background", show_spinner=False)
+def fetch_produkty_raw():
+    resp = _tbl("produkty").select("id,nazwa,liczba,cena,kategoria_id").order("id").execute()
+    return resp.data or []
+
+
+# Etykiety do selectboxów: (etykieta, wiersz), budowane raz na odświeżenie danych
+@st.cache_data(ttl=10, refresh_mode="background", show_spinner=False)
+def fetch_produkty_options():
+    return [(f'{p["id"]} — {p["nazwa"]}', p) for p in fetch_produkty_raw()]
+
+
+# Wyszukiwarka produktów: max `limit` wyników zamiast całej tabeli w selectboxie.
+# Każda fraza to osobny klucz, więc cache musi być ograniczony (max_entries)
+@st.cache_data(ttl=10, max_entries=100, refresh_mode="background", show_spinner=False)
+def search_produkty_options(q, limit=50):
+    resp = (
+        _tbl("produkty")
+        .select("id,nazwa,liczba,cena,kategoria_id")
+        .ilike("nazwa", f"%{q}%")
+        .order("nazwa")
+        .limit(int(limit))
+        .execute()
+    )
+    return [(f'{p["id"]} — {p["nazwa"]}', p) for p in resp.data or []]
+
+
+@st.cache_data(ttl=10, refresh_mode="background", show_spinner=False)
+def fetch_kategorie_options():
+    return [(f'{k["id"]} — {k["nazwa"]}', k) for k in fetch_kategorie()]
+
+
+# Wiersze kategorii + mapa id -> pozycja z jednego odczytu (indeks zawsze pasuje do wierszy)
+@st.cache_data(ttl=10, refresh_mode="background", show_spinner=False)
+def fetch_kategorie_select():
+    rows = fetch_kategorie()
+    return rows, {k["id"]: i for i, k in enumerate(rows)}
+
+
+@st.cache_data(ttl=10, refresh_mode="background", show_spinner=False)
+def fetch_produkty_join():
+    import pandas as pd  # leniwie: widoki bez tabel/wykresów (Dodaj/Usuń/Edytuj) nie ładują pandas
+    # Widok produkty_join: supabase/migrations/20261015000000_produkty_join.sql
+    resp = _tbl("produkty_join").select("id,nazwa,liczba,cena,kategoria,wartosc").order("id").execute()
+    df = pd.DataFrame(resp.data or [], columns=["id", "nazwa", "liczba", "cena", "kategoria", "wartosc"])
+    df[["liczba", "cena", "wartosc"]] = df[["liczba", "cena", "wartosc"]].fillna(0)
+    # Kolumny Arrow: ciągłe bufory zamiast obiektów Pythona (szybsze maski/sumy, st.dataframe bez konwersji)
+    return df.astype(
+        {
+            "id": "int64[pyarrow]",
+            "nazwa": "string[pyarrow]",
+            "liczba": "int64[pyarrow]",
+            "cena": "float64[pyarrow]",
+            "kategoria": "string[pyarrow]",
+            "wartosc": "float64[pyarrow]",
+        }
+    )
+
+
+@st.cache_data(ttl=10, refresh_mode="background", show_spinner=False)
+def fetch_wartosc_kategorii(top_n=10):
+    import pandas as pd
+    # GROUP BY po stronie bazy: top N kategorii + "Inne" (supabase/migrations/..._wartosc_kategorii.sql)
+    resp = get_supabase().rpc("wartosc_kategorii", {"top_n": int(top_n)}).execute()
+    df = pd.DataFrame(resp.data or [], columns=["kategoria", "wartosc"])
+    df["wartosc"] = df["wartosc"].fillna(0)
+    return df.astype({"kategoria": "string[pyarrow]", "wartosc": "float64[pyarrow]"})
+
+
+@st.cache_data(ttl=10, max_entries=100, refresh_mode="background", show_spinner=False)
+def fetch_low_stock(threshold, limit=200):
+    import pandas as pd
+    # Tylko produkty poniżej progu - filtr, sortowanie i limit po stronie bazy;
+    # NULL w liczba liczy się jak 0 (tak samo jak w dashboard_stats), więc idzie na początek
+    resp = (
+        _tbl("produkty")
+        .select("nazwa,liczba")
+        .or_(f"liczba.lte.{int(threshold)},liczba.is.null")
+        .order("liczba", nullsfirst=True)
+        .limit(int(limit))
+        .execute()
+    )
+    df = pd.DataFrame(resp.data or [], columns=["nazwa", "liczba"])
+    df["liczba"] = df["liczba"].fillna(0)
+    return df.astype({"nazwa": "string[pyarrow]", "liczba": "int64[pyarrow]"})
+
+
+@st.cache_data(ttl=10, max_entries=100, refresh_mode="background", show_spinner=False)
+def fetch_dashboard_stats(threshold):
+    resp = get_supabase().rpc("dashboard_stats", {"threshold": int(threshold)}).execute()
+    return resp.data or {}
+
+
+# Stałe SQL dla zapisów. prepare=True: Postgres parsuje/planuje zapytanie raz na połączenie z puli,
+# kolejne wywołania używają gotowego prepared statement.
+INSERT_KATEGORIA_SQL = "INSERT INTO kategorie (nazwa, opis) VALUES (%s, %s)"
+INSERT_PRODUKT_SQL = "INSERT INTO produkty (nazwa, liczba, cena, kategoria_id) VALUES (%s, %s, %s, %s)"
+DELETE_PRODUKT_SQL = "DELETE FROM produkty WHERE id = %s"
+DELETE_KATEGORIA_SQL = "DELETE FROM kategorie WHERE id = %s"
+
+
+def add_kategoria(nazwa, opis):
+    with get_pool().connection() as conn:
+        conn.execute(INSERT_KATEGORIA_SQL, (nazwa, opis), prepare=True)
+
+
+def _produkt_params(nazwa, liczba, cena, kategoria_id):
+    return (
+        nazwa,
+        int(liczba),
+        float(cena),
+        int(kategoria_id) if kategoria_id is not None else None,
+    )
+
+
+def add_produkt(nazwa, liczba, cena, kategoria_id):
+    # Blok `with ... connection()` = jedna transakcja (COMMIT na wyjściu, ROLLBACK przy błędzie)
+    with get_pool().connection() as conn:
+        conn.execute(INSERT_PRODUKT_SQL, _produkt_params(nazwa, liczba, cena, kategoria_id), prepare=True)
+
+
+def add_produkty_bulk(rows):
+    """Wstaw wiele produktów naraz: rows = [(nazwa, liczba, cena, kategoria_id), ...].
+
+    executemany w jednej transakcji - jeden COMMIT na całą paczkę zamiast na każdy wiersz.
+    """
+    with get_pool().connection() as conn:
+        with conn.cursor() as cur:
+            cur.executemany(INSERT_PRODUKT_SQL, [_produkt_params(*row) for row in rows])
+
+
+def update_produkt(prod_id, changes):
+    """UPDATE tylko zmienionych kolumn (changes: {kolumna: nowa_wartość})."""
+    if not changes:
+        return
+    assignments = sql.SQL(", ").join(sql.SQL("{} = %s").format(sql.Identifier(col)) for col in changes)
+    with get_pool().connection() as conn:
+        conn.execute(
+            sql.SQL("UPDATE produkty SET {} WHERE id = %s").format(assignments),
+            (*changes.values(), int(prod_id)),
+        )
+
+
+def delete_produkt(prod_id):
+    with get_pool().connection() as conn:
+        conn.execute(DELETE_PRODUKT_SQL, (int(prod_id),), prepare=True)
+
+
+def delete_kategoria(kat_id):
+    with get_pool().connection() as conn:
+        conn.execute(DELETE_KATEGORIA_SQL, (int(kat_id),), prepare=True)
+
+
+# Funkcje cache zależne od danej tabeli
+PRODUKTY_CACHE = (
+    fetch_produkty_raw,
+    fetch_produkty_options,
+    search_produkty_options,
+    fetch_produkty_join,
+    fetch_wartosc_kategorii,
+    fetch_low_stock,
+    fetch_dashboard_stats,
+)
+KATEGORIE_CACHE = (
+    fetch_kategorie,
+    fetch_kategorie_options,
+    fetch_kategorie_select,
+    fetch_produkty_join,
+    fetch_wartosc_kategorii,
+)
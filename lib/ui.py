@@ -0,0 +1,59 @@
+import os
+
+import streamlit as st
+
+
+# =========================
+# Helpers (pliki/obrazy)
+# =========================
+def safe_path(rel_path: str) -> str:
+    """Ścieżka względna do katalogu aplikacji (baza.py), działa na Streamlit Cloud."""
+    return os.path.join(os.path.dirname(os.path.dirname(__file__)), rel_path)
+
+
+def sidebar_image_fixed_height(path: str, height_px: int = 260):
+    """Wyświetl obrazek w sidebarze w stałej wysokości (bez 'skakania').
+
+    Obrazek idzie przez st.image (serwowany jako plik statyczny, przeglądarka go cache'uje),
+    zamiast wklejać go jako base64 do HTML przy każdym rerunie.
+    Wywołuj wewnątrz `with st.sidebar:` (działa też z fragmentu).
+    """
+    # CSS musi być emitowany przy każdym rerunie - elementy, których skrypt nie narysuje, znikają
+    st.markdown(
+        f"""
+        <style>
+        section[data-testid="stSidebar"] [data-testid="stImage"] img {{
+            height: {height_px}px;
+            object-fit: contain;
+        }}
+        </style>
+        """,
+        unsafe_allow_html=True,
+    )
+    st.image(safe_path(path), width="stretch")
+
+
+# =========================
+# Wykresy
+# =========================
+# Powyżej tylu kategorii wykres kołowy jest nieczytelny i wolny - wtedy słupki
+MAX_WYCINKOW = 8
+
+
+# Klucz cache = zawartość pie_df; każda zmiana stanów/cen to nowy wpis, więc limitujemy liczbę wpisów
+@st.cache_data(max_entries=20, show_spinner=False)
+def kategorie_figure(pie_df):
+    """Wartość per kategoria: pie dla kilku kategorii, poziome słupki dla większej liczby
+    (cache po zawartości pie_df)."""
+    import plotly.express as px  # leniwie: plotly potrzebny tylko na Dashboardzie
+
+    if len(pie_df) > MAX_WYCINKOW:
+        fig = px.bar(pie_df.sort_values("wartosc"), x="wartosc", y="kategoria", orientation="h")
+        fig.update_layout(transition={"duration": 0}, xaxis_title="Wartość (zł)", yaxis_title=None)
+        return fig
+
+    fig = px.pie(pie_df, values="wartosc", names="kategoria", hole=0.4)
+    # Bez animacji przejść, obrysów i sortowania wycinków - mniej pracy dla plotly.js
+    fig.update_layout(transition={"duration": 0})
+    fig.update_traces(marker_line_width=0, sort=False, textposition="inside", hoverinfo="label+percent")
+    return fig
@@ -0,0 +1,28 @@
+-- Widok z produktami połączonymi z kategoriami (JOIN po stronie Postgresa,
+-- jedno zapytanie REST zamiast dwóch + łączenia w Pythonie).
+create or replace view public.produkty_join
+with (security_invoker = on) as
+select
+    p.id,
+    p.nazwa,
+    coalesce(p.liczba, 0) as liczba,
+    coalesce(p.cena, 0) as cena,
+    k.nazwa as kategoria,
+    coalesce(p.liczba, 0) * coalesce(p.cena, 0) as wartosc
+from public.produkty p
+left join public.kategorie k on k.id = p.kategoria_id;
+
+
+-- Metryki dashboardu liczone w bazie (wywołanie: supabase.rpc("dashboard_stats", {"threshold": 5})).
+create or replace function public.dashboard_stats(threshold int)
+returns json
+language sql
+stable
+as $$
+    select json_build_object(
+        'total_value', coalesce(sum(coalesce(liczba, 0) * coalesce(cena, 0)), 0),
+        'total_items', coalesce(sum(coalesce(liczba, 0)), 0),
+        'low_stock_count', count(*) filter (where coalesce(liczba, 0) <= threshold)
+    )
+    from public.produkty;
+$$;
@@ -0,0 +1,8 @@
+-- Indeksy pod JOIN w widoku produkty_join (FK nie tworzy indeksu automatycznie w Postgresie)
+-- i pod wyszukiwanie/sortowanie produktów po nazwie.
+create index if not exists idx_produkty_kategoria on public.produkty (kategoria_id);
+create index if not exists idx_produkty_nazwa on public.produkty (nazwa);
+
+-- Statystyki dla planera zapytań
+analyze public.produkty;
+analyze public.kategorie;
@@ -0,0 +1,23 @@
+-- Wartość magazynu per kategoria do wykresu na Dashboardzie.
+-- Zwraca top N kategorii + jeden wiersz "Inne" z sumą pozostałych (wykres ma max N+1 wycinków).
+create or replace function public.wartosc_kategorii(top_n int default 10)
+returns table (kategoria text, wartosc numeric)
+language sql
+stable
+as $$
+    with per_kategoria as (
+        select
+            coalesce(k.nazwa, 'Brak kategorii') as kategoria,
+            sum(coalesce(p.liczba, 0) * coalesce(p.cena, 0)) as wartosc
+        from public.produkty p
+        left join public.kategorie k on k.id = p.kategoria_id
+        group by 1
+    ),
+    ranked as (
+        select kategoria, wartosc, row_number() over (order by wartosc desc) as rn
+        from per_kategoria
+    )
+    select kategoria, wartosc from ranked where rn <= top_n
+    union all
+    select 'Inne', sum(wartosc) from ranked where rn > top_n having count(*) > 0;
+$$;
@@ -0,0 +1,56 @@
+-- Wartość pozycji jako kolumna generowana (liczona przy zapisie, nie przy każdym odczycie).
+alter table public.produkty
+    add column if not exists wartosc numeric
+    generated always as (coalesce(liczba, 0) * coalesce(cena, 0)) stored;
+
+
+-- Widok i funkcje czytają gotową kolumnę zamiast liczyć liczba * cena
+drop view if exists public.produkty_join;
+create view public.produkty_join
+with (security_invoker = on) as
+select
+    p.id,
+    p.nazwa,
+    coalesce(p.liczba, 0) as liczba,
+    coalesce(p.cena, 0) as cena,
+    k.nazwa as kategoria,
+    p.wartosc
+from public.produkty p
+left join public.kategorie k on k.id = p.kategoria_id;
+
+
+create or replace function public.dashboard_stats(threshold int)
+returns json
+language sql
+stable
+as $$
+    select json_build_object(
+        'total_value', coalesce(sum(wartosc), 0),
+        'total_items', coalesce(sum(coalesce(liczba, 0)), 0),
+        'low_stock_count', count(*) filter (where coalesce(liczba, 0) <= threshold)
+    )
+    from public.produkty;
+$$;
+
+
+create or replace function public.wartosc_kategorii(top_n int default 10)
+returns table (kategoria text, wartosc numeric)
+language sql
+stable
+as $$
+    with per_kategoria as (
+        select
+            coalesce(k.nazwa, 'Brak kategorii') as kategoria,
+            sum(p.wartosc) as wartosc
+        from public.produkty p
+        left join public.kategorie k on k.id = p.kategoria_id
+        group by 1
+    ),
+    ranked as (
+        select kategoria, wartosc, row_number() over (order by wartosc desc) as rn
+        from per_kategoria
+    )
+    select kategoria, wartosc from ranked where rn <= top_n
+    union all
+    select 'Inne', sum(wartosc) from ranked where rn > top_n having count(*) > 0;
+$$;